@@ -5,11 +5,12 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -21,15 +22,43 @@ db = None
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
-if database_url and database_name:
-    _client = MongoClient(database_url)
+
+def connect():
+    """Create the Motor client; the caller pings it to warm the pool before traffic"""
+    global _client, db
+    if not (database_url and database_name):
+        return None
+
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=50,
+        minPoolSize=10,
+        maxIdleTimeMS=30000,
+        serverSelectionTimeoutMS=3000,
+        retryWrites=True,
+    )
     db = _client[database_name]
+    return db
+
+def disconnect():
+    """Close the Motor client and release pooled connections"""
+    global _client, db
+    if _client is not None:
+        _client.close()
+    _client = None
+    db = None
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
-    if db is None:
+def _resolve_db(target_db=None):
+    """Use the handle passed in by the caller, falling back to the module-level client"""
+    target = target_db if target_db is not None else db
+    if target is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    return target
+
+async def create_document(collection_name: str, data: Union[BaseModel, dict], target_db=None):
+    """Insert a single document with timestamp"""
+    target = _resolve_db(target_db)
 
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
@@ -40,16 +69,67 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await target[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def create_documents(collection_name: str, data: List[Union[BaseModel, dict]], target_db=None):
+    """Insert several documents with timestamps in a single round trip
+
+    Returns (inserted_ids, failures) where failures lists the batch index and error
+    message of each document the server rejected.
+    """
+    target = _resolve_db(target_db)
+    if not data:
+        return [], []
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for item in data:
+        data_dict = item.model_dump() if isinstance(item, BaseModel) else item.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    # Unordered inserts let the server apply the batch without stopping at the first error
+    try:
+        result = await target[collection_name].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # insert_many assigns _id to every document before sending, so the ones that
+        # were not rejected can still be reported back
+        failures = [
+            {"index": err["index"], "error": err.get("errmsg", "")}
+            for err in e.details.get("writeErrors", [])
+        ]
+        failed = {f["index"] for f in failures}
+        inserted = [str(d["_id"]) for i, d in enumerate(docs) if i not in failed]
+        return inserted, failures
+    return [str(i) for i in result.inserted_ids], []
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, target_db=None):
     """Get documents from collection"""
-    if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    target = _resolve_db(target_db)
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = target[collection_name].find(filter_dict or {})
     if limit:
-        cursor = cursor.limit(limit)
+        # Match the batch size to the limit so the result arrives in one round trip
+        cursor = cursor.limit(limit).batch_size(limit)
     
-    return list(cursor)
+    return await cursor.to_list(limit)
+
+async def aggregate_documents(collection_name: str, pipeline: list, limit: int = None, target_db=None):
+    """Run an aggregation pipeline and return the resulting documents"""
+    target = _resolve_db(target_db)
+
+    if limit:
+        cursor = target[collection_name].aggregate(pipeline, batchSize=limit)
+    else:
+        cursor = target[collection_name].aggregate(pipeline)
+    return await cursor.to_list(limit)
+
+def aggregate_cursor(collection_name: str, pipeline: list, batch_size: int = None, target_db=None):
+    """Return an async cursor over an aggregation pipeline for streaming results"""
+    target = _resolve_db(target_db)
+
+    if batch_size:
+        return target[collection_name].aggregate(pipeline, batchSize=batch_size)
+    return target[collection_name].aggregate(pipeline)
@@ -1,31 +1,91 @@
+import functools
+import logging
 import os
-from datetime import date, datetime, timedelta
+import time
+from contextlib import asynccontextmanager
+from datetime import date
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+import orjson
+from dateutil.relativedelta import relativedelta
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from database import db, create_document, get_documents
+import database
+from database import aggregate_cursor, aggregate_documents, create_document, create_documents
+from schemas import User, Product, ServiceCenter, ServiceRequest, Warranty
 
-app = FastAPI(title="Unified Product Lifecycle & Service Management API")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database pool before serving requests and close it on shutdown"""
+    app.state.db = database.connect()
+    if app.state.db is not None:
+        try:
+            await app.state.db.command("ping")
+            # Indexes backing the list endpoint filters and their newest-first sort;
+            # brands is multikey so $in uses it
+            await app.state.db.product.create_index([("user_id", 1), ("brand", 1), ("_id", -1)])
+            await app.state.db.servicecenter.create_index([("city", 1), ("brands", 1), ("_id", -1)])
+        except Exception as e:
+            # Keep serving: Motor reconnects lazily and /test reports the error
+            logger.warning("Database warm-up failed: %s", str(e)[:200])
+    yield
+    database.disconnect()
+
+
+def _get_db(request: Request):
+    # Every data endpoint takes the database through this dependency. FastAPI caches it
+    # per request, so all consumers in a request share one handle onto the bounded pool;
+    # Motor checks a pooled connection out per operation.
+    return request.app.state.db
+
+
+app = FastAPI(
+    title="Unified Product Lifecycle & Service Management API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+def _frontend_origins(value: Optional[str]) -> tuple:
+    """Parse FRONTEND_ORIGIN, a comma-separated list of allowed browser origins"""
+    return tuple(o.strip() for o in (value or "").split(",") if o.strip())
+
+
+_FRONTEND_ORIGINS = _frontend_origins(os.getenv("FRONTEND_ORIGIN"))
+if not _FRONTEND_ORIGINS:
+    logger.warning("FRONTEND_ORIGIN is not set; CORS will reject all cross-origin browser requests")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=_FRONTEND_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST"),
+    allow_headers=("Content-Type", "Authorization"),
 )
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Unified Service Platform Backend Running"}
 
 
+# Environment is fixed for the process lifetime; database.py already read it after load_dotenv()
+_DATABASE_URL_SET = bool(database.database_url)
+_DATABASE_NAME_SET = bool(database.database_name)
+
+# Collection names barely change during a deploy, so health probes reuse them briefly.
+# ts starts as None: monotonic() has no fixed origin, so 0.0 could look fresh right after boot.
+_COLLECTIONS_TTL = 30.0
+_collections_cache = {"ts": None, "val": []}
+
+
 @app.get("/test")
-def test_database():
+async def test_database(db=Depends(_get_db)):
     """Connectivity check for database and envs"""
     response = {
         "backend": "✅ Running",
@@ -39,10 +99,15 @@ def test_database():
         if db is not None:
             response["database"] = "✅ Available"
             response["connection_status"] = "Connected"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-            response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
+            response["database_url"] = "✅ Set" if _DATABASE_URL_SET else "❌ Not Set"
+            response["database_name"] = "✅ Set" if _DATABASE_NAME_SET else "❌ Not Set"
             try:
-                response["collections"] = db.list_collection_names()[:10]
+                now = time.monotonic()
+                ts = _collections_cache["ts"]
+                if ts is None or now - ts > _COLLECTIONS_TTL:
+                    _collections_cache["val"] = (await db.list_collection_names())[:10]
+                    _collections_cache["ts"] = now
+                response["collections"] = _collections_cache["val"]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️ Connected but Error: {str(e)[:80]}"
@@ -52,15 +117,8 @@ def test_database():
 
 
 # ------------ Schemas for requests/responses (lightweight for endpoints) ---------
-class ProductIn(BaseModel):
-    user_id: str
-    brand: str
-    model: str
-    serial_number: str
-    category: Optional[str] = None
-    purchase_date: Optional[date] = None
-    warranty_months: Optional[int] = 12
-    invoice_url: Optional[str] = None
+class ProductIn(Product):
+    pass
 
 
 class ProductOut(ProductIn):
@@ -84,107 +142,203 @@ class ServiceRequestOut(ServiceRequestIn):
 
 # ------------------------------ Helper functions --------------------------------
 
-def collection(name: str):
-    return db[name]
+def _wants_ndjson(request: Request) -> bool:
+    return "application/x-ndjson" in request.headers.get("accept", "")
+
+
+async def _ndjson_response(cursor) -> StreamingResponse:
+    """Stream cursor documents as newline-delimited JSON without building a list"""
+    # The cursor is lazy, so pull the first document before any headers go out; query
+    # and connection errors then surface as an error status instead of an empty 200
+    it = cursor.__aiter__()
+    try:
+        first = await it.__anext__()
+    except StopAsyncIteration:
+        first = None
 
+    async def lines():
+        if first is None:
+            return
+        yield orjson.dumps(first) + b"\n"
+        async for doc in it:
+            yield orjson.dumps(doc) + b"\n"
 
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@functools.lru_cache(maxsize=4096)
 def compute_warranty_end(purchase_date: Optional[date], months: Optional[int]) -> Optional[date]:
     if not purchase_date or not months or months <= 0:
         return None
-    # Add months approximately as 30 days blocks for MVP
-    return purchase_date + timedelta(days=30 * months)
+    return purchase_date + relativedelta(months=months)
+
+
+def _product_doc(product: ProductIn) -> dict:
+    """Build the stored product document, including the precomputed warranty_end"""
+    # ProductIn is a Product, so the request body is only validated once
+    doc = product.model_dump(mode="json")
+    # Compute derived fields once at write time so list reads can return them as-is
+    warranty_end = compute_warranty_end(product.purchase_date, product.warranty_months)
+    doc["warranty_end"] = warranty_end.isoformat() if warranty_end else None
+    return doc
+
+
+# Server-side equivalent of compute_warranty_end for aggregation pipelines ($dateAdd
+# needs MongoDB 5.0+). purchase_date may be stored as a date or an ISO string; anything
+# unparseable yields null.
+_WARRANTY_END_EXPR = {
+    "$let": {
+        "vars": {
+            "pd": {"$convert": {"input": "$purchase_date", "to": "date", "onError": None, "onNull": None}},
+            "wm": "$warranty_months",
+        },
+        "in": {
+            "$cond": [
+                {"$and": ["$$pd", {"$gt": ["$$wm", 0]}]},
+                {
+                    "$dateToString": {
+                        "format": "%Y-%m-%d",
+                        "date": {
+                            "$dateAdd": {
+                                "startDate": "$$pd",
+                                "unit": "month",
+                                "amount": "$$wm",
+                            }
+                        },
+                    }
+                },
+                None,
+            ]
+        },
+    }
+}
+
+
+def model_fields(model):
+    return {k: str(v.annotation) for k, v in model.model_fields.items()}
+
+
+# The schema models are static, so the /schema payload is built once at import
+_SCHEMA_OVERVIEW = {
+    "collections": [
+        {"name": "user", "fields": model_fields(User)},
+        {"name": "product", "fields": model_fields(Product)},
+        {"name": "servicecenter", "fields": model_fields(ServiceCenter)},
+        {"name": "servicerequest", "fields": model_fields(ServiceRequest)},
+        {"name": "warranty", "fields": model_fields(Warranty)},
+    ]
+}
 
 
 # -------------------------------- API Endpoints ---------------------------------
 
 @app.post("/api/products", response_model=dict)
-def add_product(payload: ProductIn):
+async def add_product(payload: ProductIn, db=Depends(_get_db)):
     """Create a product in the user's digital vault"""
-    from schemas import Product as ProductSchema
-
-    # Insert into DB
-    product_id = create_document("product", ProductSchema(**payload.model_dump()))
-
-    # Compute derived fields
-    warranty_end = compute_warranty_end(payload.purchase_date, payload.warranty_months)
+    doc = _product_doc(payload)
+    product_id = await create_document("product", doc, target_db=db)
 
     return {
         "id": product_id,
-        "warranty_end": warranty_end.isoformat() if warranty_end else None,
+        "warranty_end": doc["warranty_end"],
         "message": "Product added successfully",
     }
 
 
+# Upper bound on /api/products/batch so one request can't build an unbounded insert
+MAX_PRODUCT_BATCH = 500
+
+
+@app.post("/api/products/batch", response_model=dict)
+async def add_products(payload: List[ProductIn], db=Depends(_get_db)):
+    """Create several products in one request with a single insert"""
+    if len(payload) > MAX_PRODUCT_BATCH:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_PRODUCT_BATCH} products per batch")
+
+    ids, failed = await create_documents("product", [_product_doc(p) for p in payload], target_db=db)
+    return {
+        "ids": ids,
+        "failed": failed,
+        "message": f"{len(ids)} of {len(payload)} products added successfully",
+    }
+
+
 @app.get("/api/products", response_model=List[dict])
-def list_products(user_id: Optional[str] = None, brand: Optional[str] = None):
-    """List products, optionally filtered by user or brand"""
+async def list_products(
+    request: Request, user_id: Optional[str] = None, brand: Optional[str] = None, db=Depends(_get_db)
+):
+    """List products, optionally filtered by user or brand (NDJSON if requested via Accept)"""
     filt = {}
     if user_id:
         filt["user_id"] = user_id
     if brand:
         filt["brand"] = brand
-    docs = get_documents("product", filt, limit=100)
-    # Convert ObjectIds
-    for d in docs:
-        d["id"] = str(d.pop("_id", ""))
-        # compute warranty_end on the fly
-        pd = d.get("purchase_date")
-        wm = d.get("warranty_months")
-        try:
-            if isinstance(pd, str):
-                pd_date = date.fromisoformat(pd)
-            elif isinstance(pd, datetime):
-                pd_date = pd.date()
-            else:
-                pd_date = pd
-        except Exception:
-            pd_date = None
-        end = compute_warranty_end(pd_date, wm)
-        d["warranty_end"] = end.isoformat() if end else None
+    # Keep $match, $sort and $limit adjacent so the server can fuse them into a top-K;
+    # derived fields are only added to the documents that survive $limit.
+    # (user_id, brand, _id) serves both match and sort when user_id and brand are given;
+    # user_id alone uses the index for the match and sorts the matches in memory. A
+    # brand-only filter is not an index prefix and falls back to an _id or collection scan.
+    pipeline = [
+        {"$match": filt},
+        {"$sort": {"_id": -1}},
+        {"$limit": 100},
+        # Documents written before warranty_end was stored fall back to computing it
+        {
+            "$addFields": {
+                "id": {"$toString": "$_id"},
+                "warranty_end": {"$ifNull": ["$warranty_end", _WARRANTY_END_EXPR]},
+            }
+        },
+        {"$project": {"_id": 0}},
+    ]
+    if _wants_ndjson(request):
+        return await _ndjson_response(aggregate_cursor("product", pipeline, batch_size=100, target_db=db))
+    docs = await aggregate_documents("product", pipeline, limit=100, target_db=db)
     return docs
 
 
 @app.post("/api/service-requests", response_model=dict)
-def create_service_request(payload: ServiceRequestIn):
-    from schemas import ServiceRequest as SR
-    sr_id = create_document("servicerequest", SR(**payload.model_dump()))
+async def create_service_request(payload: ServiceRequestIn, db=Depends(_get_db)):
+    # payload is already validated; model_construct only fills in status defaults
+    sr = ServiceRequest.model_construct(**dict(payload))
+    sr_id = await create_document("servicerequest", sr.model_dump(mode="json"), target_db=db)
     return {"id": sr_id, "message": "Service request created"}
 
 
 @app.get("/api/service-centers", response_model=List[dict])
-def list_service_centers(city: Optional[str] = None, brand: Optional[str] = None):
-    """Geo-filtered and brand-filtered service center listing"""
+async def list_service_centers(
+    request: Request, city: Optional[str] = None, brand: Optional[str] = None, db=Depends(_get_db)
+):
+    """Geo-filtered and brand-filtered service center listing (NDJSON if requested via Accept)"""
     filt = {}
     if city:
         filt["city"] = city
     if brand:
         filt["brands"] = {"$in": [brand]}
-    centers = get_documents("servicecenter", filt, limit=100)
-    for c in centers:
-        c["id"] = str(c.pop("_id", ""))
+    # Same stage ordering invariant as list_products. (city, brands, _id) serves match
+    # and sort for city + brand and the match for city alone; brand alone is not a prefix.
+    pipeline = [
+        {"$match": filt},
+        {"$sort": {"_id": -1}},
+        {"$limit": 100},
+        {"$addFields": {"id": {"$toString": "$_id"}}},
+        {"$project": {"_id": 0}},
+    ]
+    if _wants_ndjson(request):
+        return await _ndjson_response(aggregate_cursor("servicecenter", pipeline, batch_size=100, target_db=db))
+    centers = await aggregate_documents("servicecenter", pipeline, limit=100, target_db=db)
     return centers
 
 
 @app.get("/schema", response_model=dict)
-def get_schema_overview():
+async def get_schema_overview():
     """Expose Pydantic schemas for viewers/tools"""
-    from schemas import User, Product, ServiceCenter, ServiceRequest, Warranty
-
-    def model_fields(model):
-        return {k: str(v.annotation) for k, v in model.model_fields.items()}
-
-    return {
-        "collections": [
-            {"name": "user", "fields": model_fields(User)},
-            {"name": "product", "fields": model_fields(Product)},
-            {"name": "servicecenter", "fields": model_fields(ServiceCenter)},
-            {"name": "servicerequest", "fields": model_fields(ServiceRequest)},
-            {"name": "warranty", "fields": model_fields(Warranty)},
-        ]
-    }
+    return _SCHEMA_OVERVIEW
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Each worker opens its own Motor pool, so keep the default small (see README)
+    workers = int(os.getenv("WEB_CONCURRENCY", 2))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers)
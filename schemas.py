@@ -7,16 +7,23 @@ lowercase of the class name (e.g., User -> "user").
 These schemas validate incoming data and help structure the database.
 """
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List
 from datetime import date
 
 
+# Shared by every schema; these are pydantic's defaults, pinned so no model opts into
+# extra per-request work such as assignment validation
+_MODEL_CONFIG = ConfigDict(extra="ignore", validate_assignment=False, str_strip_whitespace=False)
+
+
 class User(BaseModel):
     """
     End users who store products and book services.
     Collection: "user"
     """
+    model_config = _MODEL_CONFIG
+
     name: str = Field(..., description="Full name")
     email: EmailStr = Field(..., description="Email address")
     phone: Optional[str] = Field(None, description="Phone number")
@@ -29,6 +36,8 @@ class Product(BaseModel):
     A consumer-owned product stored in their digital vault.
     Collection: "product"
     """
+    model_config = _MODEL_CONFIG
+
     user_id: str = Field(..., description="Owner user _id as string")
     brand: str = Field(..., description="Brand, e.g., Samsung")
     model: str = Field(..., description="Model name/number")
@@ -44,6 +53,8 @@ class ServiceCenter(BaseModel):
     Authorized service centers registered by OEMs/partners.
     Collection: "servicecenter"
     """
+    model_config = _MODEL_CONFIG
+
     name: str = Field(..., description="Center name")
     brands: List[str] = Field(..., description="Brands supported")
     address: str = Field(..., description="Street address")
@@ -57,6 +68,8 @@ class ServiceRequest(BaseModel):
     A service request created by a user for a product.
     Collection: "servicerequest"
     """
+    model_config = _MODEL_CONFIG
+
     user_id: str = Field(..., description="User _id as string")
     product_id: str = Field(..., description="Product _id as string")
     issue_description: str = Field(..., description="Problem description")
@@ -73,6 +86,8 @@ class Warranty(BaseModel):
     Warranty info linked to a product. Kept for extensibility.
     Collection: "warranty"
     """
+    model_config = _MODEL_CONFIG
+
     product_id: str = Field(..., description="Product _id as string")
     start_date: date = Field(...)
     end_date: date = Field(...)
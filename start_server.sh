@@ -12,8 +12,11 @@ if [ ! -z "$PIDS" ]; then
 fi
 
 mkdir -p logs
+if [ -z "$FRONTEND_ORIGIN" ]; then
+  echo "WARNING: FRONTEND_ORIGIN is not set; browsers will be blocked by CORS"
+fi
 echo "Installing dependencies..."
 pip install -r requirements.txt
 echo "Starting FastAPI server..."
-nohup uvicorn main:app --host 0.0.0.0 --port 8000 --reload > logs/server.log 2>&1 
+nohup uvicorn main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers "${WEB_CONCURRENCY:-2}" > logs/server.log 2>&1 
 echo "Server started in background"
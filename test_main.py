@@ -0,0 +1,238 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Run without a database so the app starts against no external services
+    monkeypatch.setattr(database, "database_url", None)
+    monkeypatch.setattr(database, "database_name", None)
+    with TestClient(main.app) as c:
+        yield c
+
+
+def test_root(client):
+    r = client.get("/")
+    assert r.status_code == 200
+    assert r.json() == {"message": "Unified Service Platform Backend Running"}
+
+
+def test_database_status_without_database(client):
+    r = client.get("/test")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["backend"] == "✅ Running"
+    assert body["connection_status"] == "Not Connected"
+    assert body["collections"] == []
+
+
+def test_schema_overview(client):
+    r = client.get("/schema")
+    assert r.status_code == 200
+    names = [c["name"] for c in r.json()["collections"]]
+    assert names == ["user", "product", "servicecenter", "servicerequest", "warranty"]
+    assert "warranty_months" in r.json()["collections"][1]["fields"]
+
+
+def test_unreachable_database_does_not_block_startup(monkeypatch):
+    # Nothing listens on port 1, so the startup ping fails and /test reports it
+    monkeypatch.setattr(database, "database_url", "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200")
+    monkeypatch.setattr(database, "database_name", "test")
+    with TestClient(main.app) as c:
+        r = c.get("/test")
+    assert r.status_code == 200
+    assert r.json()["database"].startswith("⚠️ Connected but Error")
+
+
+class _FakeInsertResult:
+    inserted_id = "abc123"
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_one(self, doc):
+        self.inserted.append(doc)
+        return _FakeInsertResult()
+
+
+def test_add_product_uses_injected_db(client):
+    products = _FakeCollection()
+    main.app.dependency_overrides[main._get_db] = lambda: {"product": products}
+    try:
+        r = client.post(
+            "/api/products",
+            json={"user_id": "u1", "brand": "Acme", "model": "X1", "serial_number": "S1",
+                  "purchase_date": "2024-01-31", "warranty_months": 1},
+        )
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.json()["id"] == "abc123"
+    assert r.json()["warranty_end"] == "2024-02-29"
+    assert products.inserted[0]["serial_number"] == "S1"
+    assert products.inserted[0]["warranty_end"] == "2024-02-29"
+    assert products.inserted[0]["purchase_date"] == "2024-01-31"
+
+
+def test_frontend_origins_parsing():
+    assert main._frontend_origins(None) == ()
+    assert main._frontend_origins("") == ()
+    assert main._frontend_origins("https://a.example, https://b.example,") == (
+        "https://a.example",
+        "https://b.example",
+    )
+
+
+class _FakeBatchCollection:
+    async def insert_many(self, docs, ordered=True):
+        from pymongo.errors import BulkWriteError
+
+        for i, d in enumerate(docs):
+            d["_id"] = f"id{i}"
+        raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "duplicate key"}], "nInserted": 2})
+
+
+def _product(serial):
+    return {"user_id": "u1", "brand": "Acme", "model": "X1", "serial_number": serial}
+
+
+def test_add_products_reports_partial_failures(client):
+    main.app.dependency_overrides[main._get_db] = lambda: {"product": _FakeBatchCollection()}
+    try:
+        r = client.post("/api/products/batch", json=[_product("S1"), _product("S2"), _product("S3")])
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.json()["ids"] == ["id0", "id2"]
+    assert r.json()["failed"] == [{"index": 1, "error": "duplicate key"}]
+
+
+def test_add_products_rejects_oversized_batch(client):
+    payload = [_product(f"S{i}") for i in range(main.MAX_PRODUCT_BATCH + 1)]
+    r = client.post("/api/products/batch", json=payload)
+    assert r.status_code == 422
+
+
+class _FakeCursor:
+    def __init__(self, docs, error=None):
+        self._docs = list(docs)
+        self._error = error
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._error is not None:
+            raise self._error
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+    async def to_list(self, length=None):
+        return [doc async for doc in self]
+
+
+class _FakeAggregateCollection:
+    def __init__(self, docs=(), error=None):
+        self._docs = docs
+        self._error = error
+
+    def aggregate(self, pipeline, **kwargs):
+        return _FakeCursor(self._docs, self._error)
+
+
+_CENTERS = [{"id": "c1", "name": "North"}, {"id": "c2", "name": "South"}]
+
+
+def _override_centers(collection):
+    main.app.dependency_overrides[main._get_db] = lambda: {"servicecenter": collection}
+
+
+def test_list_service_centers_json(client):
+    _override_centers(_FakeAggregateCollection(_CENTERS))
+    try:
+        r = client.get("/api/service-centers")
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.json() == _CENTERS
+
+
+def test_list_service_centers_ndjson(client):
+    _override_centers(_FakeAggregateCollection(_CENTERS))
+    try:
+        r = client.get("/api/service-centers", headers={"Accept": "application/x-ndjson"})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in r.text.splitlines()] == _CENTERS
+
+
+def test_list_service_centers_ndjson_empty(client):
+    _override_centers(_FakeAggregateCollection([]))
+    try:
+        r = client.get("/api/service-centers", headers={"Accept": "application/x-ndjson"})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.text == ""
+
+
+def test_list_service_centers_ndjson_cursor_error(monkeypatch):
+    # A failing cursor must produce an error status, not a 200 with an empty body
+    monkeypatch.setattr(database, "database_url", None)
+    monkeypatch.setattr(database, "database_name", None)
+    _override_centers(_FakeAggregateCollection(error=RuntimeError("connection reset")))
+    try:
+        with TestClient(main.app, raise_server_exceptions=False) as c:
+            r = c.get("/api/service-centers", headers={"Accept": "application/x-ndjson"})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert r.status_code == 500
+
+
+class _FakeAdminDb:
+    def __init__(self):
+        self.calls = 0
+
+    async def list_collection_names(self):
+        self.calls += 1
+        return ["product", "servicecenter"]
+
+
+@pytest.fixture
+def admin_db(client, monkeypatch):
+    monkeypatch.setattr(main, "_collections_cache", {"ts": None, "val": []})
+    fake = _FakeAdminDb()
+    main.app.dependency_overrides[main._get_db] = lambda: fake
+    yield fake
+    main.app.dependency_overrides.clear()
+
+
+def test_collections_cache_cold_right_after_boot(client, admin_db, monkeypatch):
+    # monotonic() counts from boot on Linux, so it can be below the TTL on a fresh host
+    monkeypatch.setattr(main.time, "monotonic", lambda: 5.0)
+    r = client.get("/test")
+    assert admin_db.calls == 1
+    assert r.json()["collections"] == ["product", "servicecenter"]
+
+
+def test_collections_cache_warm_and_expiry(client, admin_db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: clock[0])
+    client.get("/test")
+    clock[0] += 10
+    r = client.get("/test")
+    assert admin_db.calls == 1
+    assert r.json()["collections"] == ["product", "servicecenter"]
+    clock[0] += main._COLLECTIONS_TTL
+    client.get("/test")
+    assert admin_db.calls == 2